@@ -1,73 +1,225 @@
 import pandas as pd
+import numpy as np
 import re
 from typing import List, Dict, Tuple
+from backends import get_backend, backend_for
 
 class TransactionAnalyzer:
-    def __init__(self):
+    def __init__(self, backend: str = 'pandas'):
+        # Flagging and aggregation run on the backend's table type and engine
+        self.backend = get_backend(backend)
         self.suspicious_entities = ['guddu', 'prabhat', 'arif', 'coal india']
+        # Relative amount jump that starts a new group of recurring payments
+        self.recurring_amount_tolerance = 0.05
+        # Cadence name -> (median gap window, per-gap jitter window) in days
+        self.recurring_cadences = {
+            'weekly': ((6, 8), (4, 10)),
+            'monthly': ((26, 35), (20, 40))
+        }
+        self.recurring_min_occurrences = 3
     
-    def flag_large_dd_withdrawals(self, transactions_df: pd.DataFrame, threshold: float = 10000) -> pd.DataFrame:
+    def flag_large_dd_withdrawals(self, transactions_df, threshold: float = 10000):
         """Flag DD withdrawals above threshold"""
-        flagged = transactions_df.copy()
+        is_dd = self.backend.contains_any(transactions_df, 'description', ['dd', 'demand draft'])
+        withdrawal = self.backend.column(transactions_df, 'withdrawal_amount').astype(float)
         
-        def is_dd_withdrawal(description):
-            desc_lower = str(description).lower()
-            return ('dd' in desc_lower or 'demand draft' in desc_lower) and flagged['withdrawal_amount'] > 0
+        return self.backend.with_columns(transactions_df, {'is_large_dd': is_dd & (withdrawal > threshold)})
+    
+    def flag_large_rtgs_deposits(self, transactions_df, threshold: float = 50000):
+        """Flag RTGS deposits above threshold"""
+        is_rtgs = self.backend.contains_any(transactions_df, 'description', ['rtgs'])
+        if 'channel' in self.backend.column_names(transactions_df):
+            is_rtgs = is_rtgs | (self.backend.column(transactions_df, 'channel') == 'RTGS')
+        deposit = self.backend.column(transactions_df, 'deposit_amount').astype(float)
         
-        flagged['is_large_dd'] = flagged.apply(
-            lambda row: is_dd_withdrawal(row['description']) and row['withdrawal_amount'] > threshold, 
-            axis=1
-        )
+        return self.backend.with_columns(transactions_df, {'is_large_rtgs': is_rtgs & (deposit > threshold)})
+    
+    def flag_specific_entities(self, transactions_df):
+        """Flag transactions with specific entities"""
+        is_suspicious = self.backend.contains_any(transactions_df, 'description', self.suspicious_entities)
+        if 'counterparty' in self.backend.column_names(transactions_df):
+            is_suspicious = is_suspicious | self.backend.contains_any(
+                transactions_df, 'counterparty', self.suspicious_entities
+            )
         
-        return flagged
+        return self.backend.with_columns(transactions_df, {'is_suspicious_entity': is_suspicious})
     
-    def flag_large_rtgs_deposits(self, transactions_df: pd.DataFrame, threshold: float = 50000) -> pd.DataFrame:
-        """Flag RTGS deposits above threshold"""
-        flagged = transactions_df.copy()
+    def summarize_counterparties(self, transactions_df, top_n: int = 10) -> pd.DataFrame:
+        """Transaction count and totals per counterparty, largest total volume first"""
+        backend = backend_for(transactions_df)
+        columns = ['counterparty', 'transaction_count', 'withdrawal_amount', 'deposit_amount', 'total_amount']
+        if 'counterparty' not in backend.column_names(transactions_df):
+            return pd.DataFrame(columns=columns)
+        
+        # Grouped in the table's own engine; only the per-counterparty rows come back as pandas
+        summary = backend.group_aggregate(transactions_df, ['counterparty'], {
+            'transaction_count': ('description', 'size'),
+            'withdrawal_amount': ('withdrawal_amount', 'sum'),
+            'deposit_amount': ('deposit_amount', 'sum')
+        })
+        if summary.empty:
+            return pd.DataFrame(columns=columns)
+        summary['total_amount'] = summary['withdrawal_amount'] + summary['deposit_amount']
+        summary['counterparty'] = summary['counterparty'].astype(str)
+        
+        return summary.sort_values('total_amount', ascending=False).head(top_n)[columns].reset_index(drop=True)
+    
+    def flag_recurring_and_duplicates(self, transactions_df):
+        """Flag duplicate rows and periodic series (salary, EMIs, subscriptions)
         
-        def is_rtgs_deposit(description):
-            desc_lower = str(description).lower()
-            return 'rtgs' in desc_lower and flagged['deposit_amount'] > 0
+        Rows are grouped by a hash of the normalized description, direction and
+        amount cluster, then sorted once by group and date. Duplicates are adjacent
+        identical rows; cadence is read off the day gaps within each group.
+        """
+        n = self.backend.num_rows(transactions_df)
+        if n == 0:
+            return self.backend.with_columns(transactions_df, {
+                'is_duplicate': np.zeros(0, dtype=bool),
+                'recurring_series': np.zeros(0, dtype=np.int64),
+                'recurrence': np.array([], dtype=object)
+            })
         
-        flagged['is_large_rtgs'] = flagged.apply(
-            lambda row: is_rtgs_deposit(row['description']) and row['deposit_amount'] > threshold, 
-            axis=1
+        # Raw and normalized description hashes
+        desc_codes = self.backend.hash_text(transactions_df, 'description')
+        signatures = self.backend.hash_text(transactions_df, 'description', normalize=True)
+        
+        withdrawal = self.backend.column(transactions_df, 'withdrawal_amount').astype(float)
+        deposit = self.backend.column(transactions_df, 'deposit_amount').astype(float)
+        if 'balance' in self.backend.column_names(transactions_df):
+            balance = self.backend.column(transactions_df, 'balance').astype(float)
+        else:
+            balance = np.zeros(n)
+        is_deposit = deposit > 0
+        amount = np.where(is_deposit, deposit, withdrawal)
+        dates = pd.to_datetime(self.backend.column(transactions_df, 'transaction_date'))
+        days = np.asarray(dates, dtype='datetime64[D]').astype(np.int64)
+        
+        # Amount clusters: within a description and direction, sorted amounts start a new
+        # cluster only where they jump by more than the tolerance, so no fixed band edge
+        # splits a payment that hovers around one amount
+        by_amount = np.lexsort((amount, is_deposit, signatures))
+        sorted_signature, sorted_deposit, sorted_amount = signatures[by_amount], is_deposit[by_amount], amount[by_amount]
+        new_cluster = np.ones(n, dtype=bool)
+        new_cluster[1:] = (
+            (sorted_signature[1:] != sorted_signature[:-1]) |
+            (sorted_deposit[1:] != sorted_deposit[:-1]) |
+            (sorted_amount[1:] > sorted_amount[:-1] * (1 + self.recurring_amount_tolerance))
         )
+        cluster = np.empty(n, dtype=np.int64)
+        cluster[by_amount] = np.cumsum(new_cluster) - 1
+        # Number groups by first appearance so series ids don't depend on the backend's hash values
+        _, first_row, cluster_index = np.unique(cluster, return_index=True, return_inverse=True)
+        group = np.argsort(np.argsort(first_row))[cluster_index.ravel()]
+        
+        # Single sort: group, then date; identical rows end up adjacent
+        order = np.lexsort((np.arange(n), balance, withdrawal, deposit, desc_codes, days, group))
+        g, d = group[order], days[order]
+        same_as_previous = np.zeros(n, dtype=bool)
+        same_as_previous[1:] = (
+            (g[1:] == g[:-1]) & (d[1:] == d[:-1]) &
+            (desc_codes[order][1:] == desc_codes[order][:-1]) &
+            (withdrawal[order][1:] == withdrawal[order][:-1]) &
+            (deposit[order][1:] == deposit[order][:-1]) &
+            (balance[order][1:] == balance[order][:-1])
+        )
+        is_duplicate = np.zeros(n, dtype=bool)
+        is_duplicate[order] = same_as_previous
+        
+        # Cadence from day gaps between the remaining rows of each group
+        kept = order[~same_as_previous]
+        g, d = group[kept], days[kept]
+        continues = np.zeros(len(kept), dtype=bool)
+        continues[1:] = g[1:] == g[:-1]
+        gaps = pd.DataFrame({'group': g[continues], 'gap': np.diff(d, prepend=d[0])[continues]})
         
-        return flagged
+        recurrence = np.full(n, None, dtype=object)
+        series = np.full(n, -1, dtype=np.int64)
+        if not gaps.empty:
+            grouped = gaps.groupby('group')['gap']
+            stats = pd.DataFrame({'median_gap': grouped.median(), 'gap_count': grouped.size()})
+            for cadence, (median_window, jitter_window) in self.recurring_cadences.items():
+                in_window = gaps['gap'].between(*jitter_window)
+                stats[cadence] = (
+                    stats['median_gap'].between(*median_window) &
+                    (in_window.groupby(gaps['group']).mean() >= 0.75) &
+                    (stats['gap_count'] >= self.recurring_min_occurrences - 1)
+                )
+            
+            cadences = list(self.recurring_cadences)
+            recurring = stats[stats[cadences].any(axis=1)]
+            group_cadence = pd.Series(recurring[cadences].idxmax(axis=1))
+            group_series = pd.Series(np.arange(len(recurring)), index=recurring.index)
+            
+            kept_group = pd.Series(group[kept])
+            cadence_per_row = kept_group.map(group_cadence)
+            recurrence[kept] = np.where(cadence_per_row.notna(), cadence_per_row.to_numpy(dtype=object), None)
+            series[kept] = kept_group.map(group_series).fillna(-1).to_numpy(dtype=np.int64)
+        
+        return self.backend.with_columns(transactions_df, {
+            'is_duplicate': is_duplicate,
+            'recurring_series': series,
+            'recurrence': recurrence
+        })
     
-    def flag_specific_entities(self, transactions_df: pd.DataFrame) -> pd.DataFrame:
-        """Flag transactions with specific entities"""
-        flagged = transactions_df.copy()
+    def summarize_recurring(self, analyzed_df) -> pd.DataFrame:
+        """One row per recurring series with cadence, occurrences and typical amount"""
+        backend = backend_for(analyzed_df)
+        columns = ['recurring_series', 'recurrence', 'description', 'occurrences',
+                   'average_amount', 'first_date', 'last_date']
+        if 'recurring_series' not in backend.column_names(analyzed_df):
+            return pd.DataFrame(columns=columns)
         
-        def contains_suspicious_entity(description):
-            desc_lower = str(description).lower()
-            return any(entity in desc_lower for entity in self.suspicious_entities)
+        recurring = backend.filter(analyzed_df, backend.column(analyzed_df, 'recurring_series') >= 0)
+        if backend.num_rows(recurring) == 0:
+            return pd.DataFrame(columns=columns)
         
-        flagged['is_suspicious_entity'] = flagged['description'].apply(contains_suspicious_entity)
+        amount = (backend.column(recurring, 'withdrawal_amount').astype(float) +
+                  backend.column(recurring, 'deposit_amount').astype(float))
+        summary = backend.group_aggregate(backend.with_columns(recurring, {'amount': amount}), ['recurring_series'], {
+            'recurrence': ('recurrence', 'first'),
+            'description': ('description', 'first'),
+            'occurrences': ('amount', 'size'),
+            'average_amount': ('amount', 'mean'),
+            'first_date': ('transaction_date', 'min'),
+            'last_date': ('transaction_date', 'max')
+        })
+        summary['recurrence'] = summary['recurrence'].astype(str)
         
-        return flagged
+        return summary.sort_values('average_amount', ascending=False).reset_index(drop=True)[columns]
     
-    def analyze_transactions(self, transactions_df: pd.DataFrame) -> Dict:
-        """Complete analysis with all flags"""
+    def analyze_transactions(self, transactions_df) -> Dict:
+        """Complete analysis with all flags
+        
+        The analyzed table keeps the backend's type; convert with
+        self.backend.to_pandas at the UI edge.
+        """
         # Apply all flags
         analyzed_df = self.flag_large_dd_withdrawals(transactions_df)
         analyzed_df = self.flag_large_rtgs_deposits(analyzed_df)
         analyzed_df = self.flag_specific_entities(analyzed_df)
+        analyzed_df = self.flag_recurring_and_duplicates(analyzed_df)
         
         # Generate summary statistics
+        is_large_dd = self.backend.column(analyzed_df, 'is_large_dd')
+        is_large_rtgs = self.backend.column(analyzed_df, 'is_large_rtgs')
+        is_suspicious = self.backend.column(analyzed_df, 'is_suspicious_entity')
+        recurring_series = self.backend.column(analyzed_df, 'recurring_series')
+        if 'counterparty' in self.backend.column_names(analyzed_df):
+            unique_counterparties = pd.Series(self.backend.column(analyzed_df, 'counterparty')).nunique()
+        else:
+            unique_counterparties = 0
+        
         summary = {
-            'total_transactions': len(analyzed_df),
-            'total_withdrawals': analyzed_df['withdrawal_amount'].sum(),
-            'total_deposits': analyzed_df['deposit_amount'].sum(),
-            'large_dd_count': analyzed_df['is_large_dd'].sum(),
-            'large_rtgs_count': analyzed_df['is_large_rtgs'].sum(),
-            'suspicious_entity_count': analyzed_df['is_suspicious_entity'].sum(),
-            'flagged_transactions': analyzed_df[
-                analyzed_df['is_large_dd'] | 
-                analyzed_df['is_large_rtgs'] | 
-                analyzed_df['is_suspicious_entity']
-            ].shape[0]
+            'total_transactions': self.backend.num_rows(analyzed_df),
+            'total_withdrawals': self.backend.sum(analyzed_df, 'withdrawal_amount'),
+            'total_deposits': self.backend.sum(analyzed_df, 'deposit_amount'),
+            'large_dd_count': int(is_large_dd.sum()),
+            'large_rtgs_count': int(is_large_rtgs.sum()),
+            'suspicious_entity_count': int(is_suspicious.sum()),
+            'duplicate_count': int(self.backend.column(analyzed_df, 'is_duplicate').sum()),
+            'recurring_series_count': len(np.unique(recurring_series[recurring_series >= 0])),
+            'unique_counterparties': unique_counterparties,
+            'flagged_transactions': int((is_large_dd | is_large_rtgs | is_suspicious).sum())
         }
         
-        return analyzed_df, summary
\ No newline at end of file
+        return analyzed_df, summary
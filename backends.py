@@ -0,0 +1,242 @@
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Tuple
+
+# Normalized descriptions keep only letters (lowercased), so reference numbers,
+# dates and punctuation don't split repeats of the same payment
+NORMALIZE_PATTERN = r'[^a-z]+'
+
+class PandasBackend:
+    """Default backend: the transaction table is a pandas DataFrame"""
+    name = 'pandas'
+
+    def from_pandas(self, df: pd.DataFrame):
+        return df
+
+    def to_pandas(self, table) -> pd.DataFrame:
+        return table
+
+    def num_rows(self, table) -> int:
+        return len(table)
+
+    def column_names(self, table) -> List[str]:
+        return list(table.columns)
+
+    def column(self, table, name: str) -> np.ndarray:
+        return table[name].to_numpy()
+
+    def with_columns(self, table, columns: Dict[str, np.ndarray]):
+        return table.assign(**columns)
+
+    def _categories(self, table, name: str):
+        values = table[name]
+        return values if isinstance(values.dtype, pd.CategoricalDtype) else values.astype('category')
+
+    def contains_any(self, table, name: str, substrings: List[str]) -> np.ndarray:
+        """Case-insensitive substring match, evaluated once per distinct value"""
+        categorical = self._categories(table, name)
+        categories = categorical.cat.categories.astype(str).str.lower()
+        matches = np.zeros(len(categories), dtype=bool)
+        for substring in substrings:
+            matches |= np.asarray(categories.str.contains(substring, regex=False), dtype=bool)
+        return np.append(matches, False)[categorical.cat.codes.to_numpy()]
+
+    def hash_text(self, table, name: str, normalize: bool = False) -> np.ndarray:
+        """uint64 hash per row, optionally after dropping digits and punctuation"""
+        categorical = self._categories(table, name)
+        categories = pd.Series(categorical.cat.categories.astype(str))
+        if normalize:
+            categories = categories.str.lower().str.replace(NORMALIZE_PATTERN, ' ', regex=True).str.strip()
+        values = np.append(categories.to_numpy(dtype=object), '')
+        return pd.util.hash_array(values)[categorical.cat.codes.to_numpy()]
+
+    def sum(self, table, name: str) -> float:
+        return float(table[name].sum())
+    
+    def filter(self, table, mask: np.ndarray):
+        return table[mask]
+    
+    def group_aggregate(self, table, keys: List[str], aggregations: Dict[str, Tuple[str, str]]) -> pd.DataFrame:
+        """One pandas row per group; aggregations maps output name -> (column, function)
+        
+        Functions are 'size', 'sum', 'mean', 'min', 'max' and 'first'. Rows with a
+        null key are skipped, and groups keep the order they first appear in.
+        """
+        return table.groupby(keys, observed=True, sort=False).agg(**aggregations).reset_index()
+
+    def write_csv(self, table, path: str):
+        table.to_csv(path, index=False)
+
+class PolarsBackend:
+    """Polars backend: string matching and hashing run in its multi-threaded lazy engine"""
+    name = 'polars'
+
+    def __init__(self):
+        try:
+            import polars
+        except ImportError:
+            raise ImportError("The polars backend requires the 'polars' package: pip install polars")
+        self.pl = polars
+
+    def from_pandas(self, df: pd.DataFrame):
+        return self.pl.from_pandas(df)
+
+    def to_pandas(self, table) -> pd.DataFrame:
+        return table.to_pandas()
+
+    def num_rows(self, table) -> int:
+        return table.height
+
+    def column_names(self, table) -> List[str]:
+        return list(table.columns)
+
+    def column(self, table, name: str) -> np.ndarray:
+        return table.get_column(name).to_numpy()
+
+    def with_columns(self, table, columns: Dict[str, np.ndarray]):
+        # Object arrays (strings with None) go through lists so Polars infers a string dtype
+        return table.with_columns([
+            self.pl.Series(name, values.tolist() if values.dtype == object else values)
+            for name, values in columns.items()
+        ])
+
+    def _text(self, name: str):
+        return self.pl.col(name).cast(self.pl.Utf8)
+
+    def contains_any(self, table, name: str, substrings: List[str]) -> np.ndarray:
+        lowered = self._text(name).str.to_lowercase()
+        expr = self.pl.any_horizontal([lowered.str.contains(s, literal=True) for s in substrings])
+        return table.lazy().select(expr.fill_null(False).alias('match')).collect().get_column('match').to_numpy()
+
+    def hash_text(self, table, name: str, normalize: bool = False) -> np.ndarray:
+        expr = self._text(name).fill_null('')
+        if normalize:
+            expr = expr.str.to_lowercase().str.replace_all(NORMALIZE_PATTERN, ' ').str.strip_chars()
+        return table.lazy().select(expr.hash(seed=0).alias('hash')).collect().get_column('hash').to_numpy()
+
+    def sum(self, table, name: str) -> float:
+        return float(table.get_column(name).sum() or 0.0)
+    
+    def filter(self, table, mask: np.ndarray):
+        return table.filter(self.pl.Series(mask))
+    
+    def group_aggregate(self, table, keys: List[str], aggregations: Dict[str, Tuple[str, str]]) -> pd.DataFrame:
+        exprs = [
+            self.pl.len().alias(name) if function == 'size' else getattr(self.pl.col(column), function)().alias(name)
+            for name, (column, function) in aggregations.items()
+        ]
+        grouped = table.lazy().drop_nulls(keys).group_by(keys, maintain_order=True).agg(exprs)
+        return grouped.collect().to_pandas()
+
+    def write_csv(self, table, path: str):
+        table.write_csv(path)
+
+class ArrowBackend:
+    """Arrow backend: string kernels from pyarrow.compute, which run multi-threaded in C++"""
+    name = 'arrow'
+
+    def __init__(self):
+        try:
+            import pyarrow
+            import pyarrow.compute
+            import pyarrow.csv
+        except ImportError:
+            raise ImportError("The arrow backend requires the 'pyarrow' package: pip install pyarrow")
+        self.pa = pyarrow
+        self.pc = pyarrow.compute
+        self.csv = pyarrow.csv
+
+    def from_pandas(self, df: pd.DataFrame):
+        return self.pa.Table.from_pandas(df, preserve_index=False)
+
+    def to_pandas(self, table) -> pd.DataFrame:
+        return table.to_pandas()
+
+    def num_rows(self, table) -> int:
+        return table.num_rows
+
+    def column_names(self, table) -> List[str]:
+        return list(table.column_names)
+
+    def _decoded(self, table, name: str):
+        """Column with dictionary (categorical) encoding removed"""
+        values = table.column(name)
+        if self.pa.types.is_dictionary(values.type):
+            values = self.pa.chunked_array([chunk.dictionary_decode() for chunk in values.chunks],
+                                           type=values.type.value_type)
+        return values
+
+    def column(self, table, name: str) -> np.ndarray:
+        return self._decoded(table, name).to_numpy()
+
+    def with_columns(self, table, columns: Dict[str, np.ndarray]):
+        for name, values in columns.items():
+            array = self.pa.array(values)
+            if name in table.column_names:
+                table = table.set_column(table.column_names.index(name), name, array)
+            else:
+                table = table.append_column(name, array)
+        return table
+
+    def _text(self, table, name: str):
+        return self.pc.cast(self._decoded(table, name), self.pa.string())
+
+    def contains_any(self, table, name: str, substrings: List[str]) -> np.ndarray:
+        lowered = self.pc.utf8_lower(self._text(table, name))
+        matches = self.pc.match_substring(lowered, substrings[0])
+        for substring in substrings[1:]:
+            matches = self.pc.or_(matches, self.pc.match_substring(lowered, substring))
+        return self.pc.fill_null(matches, False).to_numpy()
+
+    def hash_text(self, table, name: str, normalize: bool = False) -> np.ndarray:
+        text = self.pc.fill_null(self._text(table, name), '')
+        if normalize:
+            text = self.pc.utf8_trim_whitespace(
+                self.pc.replace_substring_regex(self.pc.utf8_lower(text), NORMALIZE_PATTERN, ' ')
+            )
+        # Hash each distinct value once and broadcast through the dictionary indices
+        encoded = self.pc.dictionary_encode(text).combine_chunks()
+        hashes = pd.util.hash_array(encoded.dictionary.to_numpy(zero_copy_only=False).astype(object))
+        return hashes[encoded.indices.to_numpy()]
+
+    def sum(self, table, name: str) -> float:
+        return float(self.pc.sum(table.column(name)).as_py() or 0.0)
+    
+    def filter(self, table, mask: np.ndarray):
+        return table.filter(self.pa.array(mask))
+    
+    def group_aggregate(self, table, keys: List[str], aggregations: Dict[str, Tuple[str, str]]) -> pd.DataFrame:
+        for key in keys:
+            table = table.filter(self.pc.is_valid(table.column(key)))
+        # Arrow names outputs '<column>_<function>' ('count_all' for size); single-threaded keeps 'first' stable
+        specs = [([], 'count_all') if function == 'size' else (column, function)
+                 for column, function in aggregations.values()]
+        grouped = table.group_by(keys, use_threads=False).aggregate(specs)
+        outputs = ['count_all' if function == 'size' else f"{column}_{function}"
+                   for column, function in aggregations.values()]
+        grouped = grouped.select(keys + outputs).rename_columns(keys + list(aggregations))
+        return grouped.to_pandas()
+
+    def write_csv(self, table, path: str):
+        self.csv.write_csv(table, path)
+
+BACKENDS = {
+    'pandas': PandasBackend,
+    'polars': PolarsBackend,
+    'arrow': ArrowBackend
+}
+
+def get_backend(name: str = 'pandas'):
+    """Backend instance by name: 'pandas' (default), 'polars' or 'arrow'"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown DataFrame backend: {name}. Choose from {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
+
+def backend_for(table):
+    """Backend matching the type of an existing transaction table"""
+    module = type(table).__module__
+    if module.startswith('polars'):
+        return get_backend('polars')
+    if module.startswith('pyarrow'):
+        return get_backend('arrow')
+    return get_backend('pandas')
@@ -0,0 +1,79 @@
+"""Compare DataFrame backends on a large synthetic ledger.
+
+Usage: python benchmark.py --rows 1000000 --backends pandas polars arrow
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from analyzer import TransactionAnalyzer
+from backends import BACKENDS
+from pdf_extractor import PDFExtractor
+from utils import save_to_csv
+
+def make_ledger(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Synthetic statement with realistic NEFT/RTGS/UPI/ACH/DD narrations"""
+    rng = np.random.default_rng(seed)
+    names = np.array(['ACME CORP', 'GUDDU KUMAR', 'PRABHAT', 'COAL INDIA LTD', 'ZOMATO', 'HDFC LOAN EMI',
+                      'RAHUL SHARMA', 'NETFLIX', 'ELECTRICITY BOARD', 'ARIF KHAN'])
+    templates = np.array(['NEFT-HDFCN{ref}-{name}', 'RTGS-UTIBR{ref}-{name}', 'UPI/{ref}/{name}/pay@ybl',
+                          'ACH/{name}/{ref}', 'DD ISSUED {ref} {name}'])
+
+    refs = rng.integers(10**11, 10**12, rows)
+    name_idx = rng.integers(0, len(names), rows)
+    template_idx = rng.integers(0, len(templates), rows)
+    descriptions = [templates[t].format(ref=r, name=names[n]) for t, r, n in zip(template_idx, refs, name_idx)]
+
+    is_deposit = rng.random(rows) < 0.4
+    amounts = np.round(rng.lognormal(8, 1.5, rows), 2)
+    dates = pd.Timestamp('2018-01-01') + pd.to_timedelta(np.sort(rng.integers(0, 365 * 6, rows)), unit='D')
+
+    return pd.DataFrame({
+        'transaction_date': dates,
+        'description': descriptions,
+        'withdrawal_amount': np.where(is_deposit, 0.0, amounts),
+        'deposit_amount': np.where(is_deposit, amounts, 0.0),
+        'balance': np.round(rng.random(rows) * 1e6, 2)
+    })
+
+def run(rows: int, backends):
+    ledger = PDFExtractor().add_narration_fields(make_ledger(rows))
+    print(f"Synthetic ledger: {rows:,} rows\n")
+    print(f"{'backend':<10}{'convert (s)':>14}{'analyze (s)':>14}{'export (s)':>14}{'to pandas (s)':>16}")
+
+    for name in backends:
+        try:
+            analyzer = TransactionAnalyzer(backend=name)
+        except ImportError as e:
+            print(f"{name:<10}skipped: {e}")
+            continue
+
+        start = time.perf_counter()
+        table = analyzer.backend.from_pandas(ledger)
+        convert_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        analyzed, summary = analyzer.analyze_transactions(table)
+        analyze_time = time.perf_counter() - start
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            start = time.perf_counter()
+            save_to_csv(analyzed, f"benchmark_{name}", output_dir)
+            export_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        analyzer.backend.to_pandas(analyzed)
+        to_pandas_time = time.perf_counter() - start
+
+        print(f"{name:<10}{convert_time:>14.2f}{analyze_time:>14.2f}{export_time:>14.2f}{to_pandas_time:>16.2f}"
+              f"   flagged={summary['flagged_transactions']:,}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    args = parser.parse_args()
+    run(args.rows, args.backends)
@@ -0,0 +1,248 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from pdf_extractor import PDFExtractor
+
+def _extract_job(job_id: str, pdf_bytes: bytes, progress,
+                 date_range: Optional[Tuple] = None, backend: str = 'pandas') -> Tuple[Tuple, Dict[int, str]]:
+    """Worker entry point: extract one statement and publish per-page progress
+
+    Returns the extract_from_pdf output together with the raw text of each
+    extracted page, which also travels on the exception if extraction fails.
+    """
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
+        tmp_file.write(pdf_bytes)
+        tmp_path = tmp_file.name
+
+    def report(pages_done: int, page_count: int):
+        progress[job_id] = (pages_done, page_count)
+
+    extractor = PDFExtractor(backend=backend)
+    try:
+        statement = extractor.extract_from_pdf(tmp_path, progress_callback=report, date_range=date_range)
+        return statement, extractor.page_texts
+    except Exception as e:
+        e.page_texts = extractor.page_texts
+        raise
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+class ExtractionScheduler:
+    """Process-wide extraction pool shared by all Streamlit sessions
+
+    At most max_workers statements are extracted at once. Pending jobs wait in
+    per-session queues that are served round-robin, so a session with many or
+    large uploads cannot starve the others. Finished results are kept per file
+    hash so re-runs and other sessions uploading the same file reuse them; a
+    result is never evicted while a subscribed session has not read it yet.
+    """
+
+    def __init__(self, max_workers: int = 2, max_results: int = 16, backend: str = 'pandas'):
+        self.max_workers = max(1, max_workers)
+        self.backend = backend
+        self.max_results = max_results
+        self._context = multiprocessing.get_context('spawn')
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self._context)
+        self._manager = self._context.Manager()
+        self._progress = self._manager.dict()
+        self._lock = threading.RLock()
+        self._session_queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._jobs: Dict[str, Dict] = {}
+        self._jobs_by_key: "OrderedDict[str, str]" = OrderedDict()
+        self._running = 0
+
+    def submit(self, session_id: str, key: str, pdf_bytes: bytes, date_range: Optional[Tuple] = None) -> str:
+        """Queue a statement for extraction and return its job id
+
+        A job already queued, running or finished for the same key is reused, so
+        the key should identify both the file and the requested date range.
+        """
+        with self._lock:
+            job_id = self._jobs_by_key.get(key)
+            if job_id is not None and self._jobs[job_id]['state'] != 'failed':
+                self._jobs_by_key.move_to_end(key)
+                self._jobs[job_id]['subscribers'].add(session_id)
+                return job_id
+            if job_id is not None:
+                # Retry a failed job; it is kept only until its other subscribers have read the error
+                self._jobs[job_id]['subscribers'].discard(session_id)
+                if not self._jobs[job_id]['subscribers']:
+                    del self._jobs[job_id]
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'key': key,
+                'session_id': session_id,
+                'subscribers': {session_id},
+                'pdf_bytes': pdf_bytes,
+                'date_range': date_range,
+                'state': 'queued',
+                'future': None
+            }
+            self._jobs_by_key[key] = job_id
+            self._session_queues.setdefault(session_id, deque()).append(job_id)
+            self._dispatch()
+
+        return job_id
+
+    def _dispatch(self):
+        """Start queued jobs round-robin across sessions while workers are free (lock held)"""
+        while self._running < self.max_workers and self._session_queues:
+            session_id, queue = next(iter(self._session_queues.items()))
+            job_id = queue.popleft()
+            # The session goes to the back of the line for its next job
+            if queue:
+                self._session_queues.move_to_end(session_id)
+            else:
+                del self._session_queues[session_id]
+
+            job = self._jobs[job_id]
+            job['state'] = 'running'
+            self._running += 1
+            args = (_extract_job, job_id, job.pop('pdf_bytes'), self._progress, job['date_range'], self.backend)
+            try:
+                future = self._executor.submit(*args)
+            except BrokenProcessPool:
+                self._restart_executor(self._executor)
+                future = self._executor.submit(*args)
+            job['future'] = future
+            job['executor'] = self._executor
+            future.add_done_callback(lambda done, job_id=job_id: self._on_done(job_id, done))
+
+    def _restart_executor(self, broken: ProcessPoolExecutor):
+        """Replace a pool whose worker died (e.g. out of memory) so later jobs can still run (lock held)"""
+        if self._executor is broken:
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self._context)
+
+    def _on_done(self, job_id: str, future: Future):
+        with self._lock:
+            self._running -= 1
+            job = self._jobs[job_id]
+            error = None if future.cancelled() else future.exception()
+            job['state'] = 'failed' if future.cancelled() or error is not None else 'done'
+            if isinstance(error, BrokenProcessPool):
+                self._restart_executor(job.pop('executor'))
+            job.pop('executor', None)
+            self._progress.pop(job_id, None)
+            self._evict_results()
+            self._dispatch()
+
+    def _evict_results(self):
+        """Drop the oldest finished results beyond max_results that no session still has to read (lock held)"""
+        finished = [key for key, job_id in self._jobs_by_key.items()
+                    if self._jobs[job_id]['state'] in ('done', 'failed')]
+        unread = [key for key in finished if not self._jobs[self._jobs_by_key[key]]['subscribers']]
+        for key in unread[:max(0, len(finished) - self.max_results)]:
+            del self._jobs[self._jobs_by_key.pop(key)]
+
+    def _queue_position(self, job_id: str) -> int:
+        """1-based number of jobs that start before this one, counting itself (lock held)"""
+        session_id = self._jobs[job_id]['session_id']
+        sessions = list(self._session_queues.items())
+        for rank, (queued_session, queue) in enumerate(sessions):
+            if queued_session == session_id and job_id in queue:
+                round_index = list(queue).index(job_id)
+                # Full rounds served to every session, then the sessions ahead in this round
+                ahead = sum(min(len(other), round_index) for _, other in sessions)
+                ahead += sum(1 for _, other in sessions[:rank] if len(other) > round_index)
+                return ahead + 1
+        return 0
+
+    def status(self, job_id: str) -> Dict:
+        """Current state, queue position and page progress of a job"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return {'state': 'unknown', 'queue_position': 0, 'pages_done': 0, 'page_count': 0}
+
+            pages_done, page_count = self._progress.get(job_id, (0, 0))
+            return {
+                'state': job['state'],
+                'queue_position': self._queue_position(job_id) if job['state'] == 'queued' else 0,
+                'pages_done': pages_done,
+                'page_count': page_count
+            }
+
+    def _future(self, job_id: str) -> Future:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                raise KeyError(f"Unknown extraction job: {job_id}")
+            future = job['future']
+        if future is None:
+            raise RuntimeError("Extraction job has not started yet")
+        return future
+
+    def result(self, job_id: str, timeout: Optional[float] = None,
+               session_id: Optional[str] = None) -> Tuple[pd.DataFrame, pd.DataFrame, str]:
+        """Block until a job finishes and return its extract_from_pdf output
+
+        Passing the session_id unsubscribes that session, after which the result
+        may be evicted once no other session is waiting on it.
+        """
+        future = self._future(job_id)
+        try:
+            statement, page_texts = future.result(timeout=timeout)
+        finally:
+            if session_id is not None and future.done():
+                self._unsubscribe(job_id, session_id)
+        return statement
+
+    def _unsubscribe(self, job_id: str, session_id: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job['subscribers'].discard(session_id)
+            if not job['subscribers'] and self._jobs_by_key.get(job['key']) != job_id:
+                del self._jobs[job_id]  # A failed job that has since been retried
+            self._evict_results()
+
+    def page_texts(self, job_id: str) -> Dict[int, str]:
+        """Raw text of each extracted page (0-based page number), also for failed jobs"""
+        future = self._future(job_id)
+        if not future.done() or future.cancelled():
+            return {}
+        error = future.exception()
+        if error is not None:
+            return getattr(error, 'page_texts', {})
+        return future.result()[1]
+
+    def cancel_session(self, session_id: str):
+        """Unsubscribe a session from its jobs and drop the queued ones nobody else waits on
+
+        Jobs are shared between sessions that submitted the same key, so a queued
+        job is only dropped once no session is waiting on it any more.
+        """
+        with self._lock:
+            for job_id, job in list(self._jobs.items()):
+                if job['state'] in ('done', 'failed') and session_id in job['subscribers']:
+                    self._unsubscribe(job_id, session_id)
+            for queued_session, queue in list(self._session_queues.items()):
+                for job_id in list(queue):
+                    job = self._jobs[job_id]
+                    job['subscribers'].discard(session_id)
+                    if job['subscribers']:
+                        continue
+                    queue.remove(job_id)
+                    del self._jobs[job_id]
+                    if self._jobs_by_key.get(job['key']) == job_id:
+                        del self._jobs_by_key[job['key']]
+                if not queue:
+                    del self._session_queues[queued_session]
+            self._evict_results()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._manager.shutdown()
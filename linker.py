@@ -0,0 +1,224 @@
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Tuple
+from backends import backend_for
+
+class StatementLinker:
+    def __init__(self, day_tolerance: int = 3, candidates_per_side: int = 4):
+        self.day_tolerance = day_tolerance
+        # Nearest deposits considered per withdrawal in each round, before and after its date
+        self.candidates_per_side = candidates_per_side
+
+    def _account_id(self, account_df: pd.DataFrame, position: int) -> str:
+        """Account number of a statement, falling back to its position"""
+        if not account_df.empty and 'account_number' in account_df.columns:
+            account_number = str(account_df['account_number'].iloc[0])
+            if account_number not in ('Not Found', 'Error', ''):
+                return account_number
+        return f"statement_{position + 1}"
+
+    def _stack_transactions(self, statements: List[Tuple[pd.DataFrame, pd.DataFrame, str]]) -> pd.DataFrame:
+        """Combine extract_from_pdf outputs into one frame tagged with the account"""
+        frames = []
+        for position, (account_df, transactions_df, bank_type) in enumerate(statements):
+            transactions_df = backend_for(transactions_df).to_pandas(transactions_df)
+            if transactions_df.empty:
+                continue
+            frame = transactions_df[['transaction_date', 'description', 'withdrawal_amount', 'deposit_amount']].copy()
+            frame['account'] = self._account_id(account_df, position)
+            frame['bank'] = bank_type
+            frame['statement'] = position
+            frame['row'] = np.arange(len(frame))
+            frames.append(frame)
+
+        if not frames:
+            return pd.DataFrame(columns=['transaction_date', 'description', 'withdrawal_amount',
+                                         'deposit_amount', 'account', 'bank', 'statement', 'row'])
+
+        stacked = pd.concat(frames, ignore_index=True)
+        stacked['transaction_date'] = pd.to_datetime(stacked['transaction_date'])
+        stacked['account'] = stacked['account'].astype('category')
+        return stacked
+
+    def _join_keys(self, frame: pd.DataFrame, amount_column: str) -> pd.DataFrame:
+        """Add integer paise amount and day number used as hash-join keys"""
+        keyed = frame[frame[amount_column] > 0].copy()
+        # Position in the stacked frame identifies a transaction across all statements
+        keyed['uid'] = keyed.index.to_numpy()
+        keyed['amount_paise'] = np.round(keyed[amount_column].to_numpy(dtype=float) * 100).astype(np.int64)
+        keyed['day'] = keyed['transaction_date'].to_numpy(dtype='datetime64[D]').astype(np.int64)
+        return keyed
+
+    def _candidates(self, w_key: np.ndarray, w_account: np.ndarray, d_key: np.ndarray, d_account: np.ndarray,
+                    w_free: np.ndarray, d_free: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Nearest unmatched deposits for each unmatched withdrawal
+        
+        For each account, the free deposits of all other accounts are sorted by key
+        and each withdrawal looks at the candidates_per_side deposits on either side
+        of its own key, so the work stays linear even when thousands of transactions
+        share a round amount. Withdrawals with the same key are spread over the run
+        of equal deposits instead of all probing the first few. Returns parallel
+        arrays of withdrawal position, deposit position and their distance in sorted order.
+        """
+        w_parts, d_parts, distance_parts = [], [], []
+        for account in np.unique(w_account[w_free]):
+            free_w = np.flatnonzero(w_free & (w_account == account))
+            free_d = np.flatnonzero(d_free & (d_account != account))
+            if len(free_d) == 0:
+                continue
+            free_w = free_w[np.argsort(w_key[free_w], kind='stable')]
+            free_d = free_d[np.argsort(d_key[free_d], kind='stable')]
+            
+            keys = w_key[free_w]
+            run_start = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+            rank = np.arange(len(keys)) - np.repeat(run_start, np.diff(np.r_[run_start, len(keys)]))
+            offsets = np.arange(-self.candidates_per_side, self.candidates_per_side)
+            positions = (np.searchsorted(d_key[free_d], keys) + rank)[:, None] + offsets
+            valid = (positions >= 0) & (positions < len(free_d))
+            w_idx = np.broadcast_to(free_w[:, None], positions.shape)
+            d_idx = free_d[np.clip(positions, 0, len(free_d) - 1)]
+            
+            # Keys of different amounts are further apart than the tolerance, so this also checks the amount
+            valid &= np.abs(d_key[d_idx] - w_key[w_idx]) <= self.day_tolerance
+            w_parts.append(w_idx[valid])
+            d_parts.append(d_idx[valid])
+            distance_parts.append(np.broadcast_to(np.abs(offsets), positions.shape)[valid])
+        
+        if not w_parts:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+        return np.concatenate(w_parts), np.concatenate(d_parts), np.concatenate(distance_parts)
+    
+    def _first_seen(self, positions: np.ndarray, size: int) -> np.ndarray:
+        """Index of the first occurrence of each position in the array (size where absent)"""
+        first = np.full(size, len(positions), dtype=np.int64)
+        np.minimum.at(first, positions, np.arange(len(positions)))
+        return first
+    
+    def _match_greedy(self, withdrawals: pd.DataFrame, deposits: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """Pair withdrawals with deposits of the same amount, closest dates first, each used at most once
+        
+        Each round accepts every candidate pair that is the best remaining one for
+        both its withdrawal and its deposit, which gives the same pairs as walking
+        the candidates in order of date gap, without a Python loop per pair.
+        Returns positions into withdrawals and deposits of the matched pairs.
+        """
+        amount_codes, _ = pd.factorize(np.concatenate([withdrawals['amount_paise'].to_numpy(),
+                                                       deposits['amount_paise'].to_numpy()]))
+        w_day, d_day = withdrawals['day'].to_numpy(), deposits['day'].to_numpy()
+        first_day = min(w_day.min(), d_day.min())
+        # Amount and day in one sortable key, with a stride wider than the day span plus tolerance
+        stride = max(w_day.max(), d_day.max()) - first_day + 2 * self.day_tolerance + 1
+        w_key = amount_codes[:len(withdrawals)] * stride + (w_day - first_day)
+        d_key = amount_codes[len(withdrawals):] * stride + (d_day - first_day)
+        w_account = withdrawals['account'].cat.codes.to_numpy()
+        d_account = deposits['account'].cat.codes.to_numpy()
+        w_uid, d_uid = withdrawals['uid'].to_numpy(), deposits['uid'].to_numpy()
+        
+        w_free = np.ones(len(withdrawals), dtype=bool)
+        d_free = np.ones(len(deposits), dtype=bool)
+        matched_w, matched_d = [], []
+        while True:
+            w_idx, d_idx, distance = self._candidates(w_key, w_account, d_key, d_account, w_free, d_free)
+            if len(w_idx) == 0:
+                break
+            
+            # Priority: smallest gap; equal gaps pair the n-th withdrawal and deposit of a
+            # day, then earliest withdrawal and stacked position
+            priority = np.lexsort((d_uid[d_idx], w_uid[w_idx], w_day[w_idx], distance,
+                                   np.abs(d_key[d_idx] - w_key[w_idx])))
+            w_idx, d_idx = w_idx[priority], d_idx[priority]
+            while len(w_idx):
+                order = np.arange(len(w_idx))
+                accepted = ((self._first_seen(w_idx, len(w_free))[w_idx] == order) &
+                            (self._first_seen(d_idx, len(d_free))[d_idx] == order))
+                
+                matched_w.append(w_idx[accepted])
+                matched_d.append(d_idx[accepted])
+                w_free[w_idx[accepted]] = False
+                d_free[d_idx[accepted]] = False
+                remaining = w_free[w_idx] & d_free[d_idx]
+                w_idx, d_idx = w_idx[remaining], d_idx[remaining]
+            # Candidates ran out; look again past the deposits matched this round
+        
+        if not matched_w:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(matched_w), np.concatenate(matched_d)
+    
+    def find_transfers(self, statements: List[Tuple[pd.DataFrame, pd.DataFrame, str]]) -> pd.DataFrame:
+        """Match withdrawals in one account to deposits of the same amount in another
+        
+        Withdrawals and deposits are keyed on (amount, day) and matched by sorted
+        search rather than a join, so round amounts shared by thousands of
+        transactions don't produce a quadratic number of candidate pairs.
+        """
+        columns = ['from_account', 'to_account', 'amount', 'withdrawal_date', 'deposit_date',
+                   'day_gap', 'withdrawal_description', 'deposit_description',
+                   'withdrawal_statement', 'withdrawal_row', 'deposit_statement', 'deposit_row']
+        
+        stacked = self._stack_transactions(statements)
+        withdrawals = self._join_keys(stacked, 'withdrawal_amount')
+        deposits = self._join_keys(stacked, 'deposit_amount')
+        if withdrawals.empty or deposits.empty:
+            return pd.DataFrame(columns=columns)
+        
+        w_pos, d_pos = self._match_greedy(withdrawals, deposits)
+        matched_w = withdrawals.iloc[w_pos].reset_index(drop=True)
+        matched_d = deposits.iloc[d_pos].reset_index(drop=True)
+        
+        edges = pd.DataFrame({
+            'from_account': matched_w['account'].astype(str),
+            'to_account': matched_d['account'].astype(str),
+            'amount': matched_w['amount_paise'] / 100,
+            'withdrawal_date': matched_w['transaction_date'],
+            'deposit_date': matched_d['transaction_date'],
+            'day_gap': matched_d['day'] - matched_w['day'],
+            'withdrawal_description': matched_w['description'],
+            'deposit_description': matched_d['description'],
+            'withdrawal_statement': matched_w['statement'],
+            'withdrawal_row': matched_w['row'],
+            'deposit_statement': matched_d['statement'],
+            'deposit_row': matched_d['row']
+        })
+        
+        return edges.sort_values(['withdrawal_date', 'withdrawal_statement', 'withdrawal_row'],
+                                 kind='stable').reset_index(drop=True)[columns]
+    
+    def summarize_fund_flows(self, edges_df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Aggregate transfer edges per account pair and net flow per account"""
+        if edges_df.empty:
+            flows = pd.DataFrame(columns=['from_account', 'to_account', 'transfer_count',
+                                          'total_amount', 'first_date', 'last_date'])
+            balances = pd.DataFrame(columns=['account', 'total_sent', 'total_received', 'net_flow'])
+            return flows, balances
+
+        flows = edges_df.groupby(['from_account', 'to_account']).agg(
+            transfer_count=('amount', 'size'),
+            total_amount=('amount', 'sum'),
+            first_date=('withdrawal_date', 'min'),
+            last_date=('withdrawal_date', 'max')
+        ).reset_index().sort_values('total_amount', ascending=False).reset_index(drop=True)
+
+        sent = flows.groupby('from_account')['total_amount'].sum()
+        received = flows.groupby('to_account')['total_amount'].sum()
+        balances = pd.DataFrame({'total_sent': sent, 'total_received': received}).fillna(0.0)
+        balances['net_flow'] = balances['total_received'] - balances['total_sent']
+        balances = balances.rename_axis('account').reset_index().sort_values('net_flow').reset_index(drop=True)
+
+        return flows, balances
+
+    def link_statements(self, statements: List[Tuple[pd.DataFrame, pd.DataFrame, str]]) -> Tuple[pd.DataFrame, Dict]:
+        """Complete cross-account linking with fund-flow graph summary"""
+        edges_df = self.find_transfers(statements)
+        flows, balances = self.summarize_fund_flows(edges_df)
+
+        summary = {
+            'accounts': len(statements),
+            'transfer_count': len(edges_df),
+            'total_transferred': edges_df['amount'].sum() if not edges_df.empty else 0.0,
+            'linked_pairs': len(flows),
+            'flows': flows,
+            'net_flows': balances
+        }
+
+        return edges_df, summary
@@ -1,11 +1,19 @@
 import streamlit as st
 import pandas as pd
 import os
-import tempfile
-from pdf_extractor import PDFExtractor
+import time
+import uuid
+import hashlib
 from analyzer import TransactionAnalyzer
 from visualizer import StatementVisualizer
-import pdfplumber
+from extraction_pool import ExtractionScheduler
+from utils import FLAG_COLUMNS, build_table_index, filter_transactions, paginate, validate_transactions
+
+# Transaction table backend: 'pandas' (default), 'polars' or 'arrow'
+DATAFRAME_BACKEND = os.environ.get("STATEMENT_DATAFRAME_BACKEND", "pandas")
+
+# Analyzed statements kept in memory, matching the extraction pool's result cache
+MAX_CACHED_STATEMENTS = 16
 
 # Page configuration
 st.set_page_config(
@@ -14,6 +22,135 @@ st.set_page_config(
     layout="wide"
 )
 
+@st.cache_resource
+def get_extraction_scheduler() -> ExtractionScheduler:
+    """One extraction pool per server process, shared by every session"""
+    default_workers = max(1, (os.cpu_count() or 2) // 2)
+    max_workers = int(os.environ.get("STATEMENT_EXTRACTION_WORKERS", default_workers))
+    return ExtractionScheduler(max_workers=max_workers, max_results=MAX_CACHED_STATEMENTS,
+                               backend=DATAFRAME_BACKEND)
+
+def extract_statement(statement_key: str, file_bytes: bytes, date_range=None):
+    """Extract a statement through the shared pool, showing queue position and page progress"""
+    if "session_id" not in st.session_state:
+        st.session_state["session_id"] = uuid.uuid4().hex
+    session_id = st.session_state["session_id"]
+    scheduler = get_extraction_scheduler()
+    
+    # A new upload or date range replaces whatever this session still had waiting
+    if st.session_state.get("extraction_key") not in (None, statement_key):
+        scheduler.cancel_session(session_id)
+    st.session_state["extraction_key"] = statement_key
+    job_id = scheduler.submit(session_id, statement_key, file_bytes, date_range)
+    st.session_state["page_texts"] = {}
+    
+    status_box = st.empty()
+    progress_bar = st.progress(0.0)
+    while True:
+        status = scheduler.status(job_id)
+        if status["state"] in ("done", "failed"):
+            break
+        if status["state"] == "unknown":
+            # The job was dropped (e.g. a failed job retried by another session); queue it again
+            job_id = scheduler.submit(session_id, statement_key, file_bytes, date_range)
+            continue
+        if status["state"] == "queued":
+            status_box.info(f"⏳ Waiting for a free worker - position {status['queue_position']} in queue")
+        elif status["page_count"]:
+            status_box.info(f"📄 Extracting page {status['pages_done']} of {status['page_count']}")
+            progress_bar.progress(status["pages_done"] / status["page_count"])
+        else:
+            status_box.info("📄 Opening PDF...")
+        time.sleep(0.5)
+    
+    status_box.empty()
+    progress_bar.empty()
+    # Read the page texts first: the result may be evicted once this session has read it
+    st.session_state["page_texts"] = scheduler.page_texts(job_id)
+    return scheduler.result(job_id, session_id=session_id)
+
+def extracted_page_texts() -> dict:
+    """Raw text of the pages the worker extracted for this session's statement"""
+    return st.session_state.get("page_texts", {})
+
+def render_raw_text_preview():
+    """Debug view of the text the worker read, without re-opening the PDF here"""
+    debug_text = ""
+    for page_number, text in sorted(extracted_page_texts().items()):
+        if text:
+            debug_text += f"--- Page {page_number+1} ---\n{text}\n\n"
+    
+    with st.expander("🔍 Raw Text Preview (Debug)"):
+        st.text_area("Full Text", debug_text, height=300)
+
+@st.cache_data(show_spinner=False, max_entries=MAX_CACHED_STATEMENTS)
+def analyze_statement(statement_key: str, _transactions_df):
+    """Analyze transactions and build the table index once per uploaded file"""
+    analyzer = TransactionAnalyzer(backend=DATAFRAME_BACKEND)
+    analyzed, summary = analyzer.analyze_transactions(_transactions_df)
+    # The UI works on pandas
+    analyzed_df = analyzer.backend.to_pandas(analyzed).reset_index(drop=True)
+    return analyzed_df, summary, build_table_index(analyzed_df)
+
+def render_transaction_table(analyzed_df: pd.DataFrame, table_index, key: str, default_flags=None):
+    """Filterable, sortable table that only sends the visible page to the browser"""
+    with st.expander("🔎 Filter & Sort", expanded=False):
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            dates = analyzed_df['transaction_date'].dropna()
+            date_range = None
+            if not dates.empty:
+                min_date, max_date = dates.min().date(), dates.max().date()
+                selected = st.date_input("Date range", value=(min_date, max_date),
+                                         min_value=min_date, max_value=max_date, key=f"{key}_dates")
+                # The widget returns a single date while the range is being picked
+                if isinstance(selected, (list, tuple)) and len(selected) == 2:
+                    if tuple(selected) != (min_date, max_date):
+                        date_range = tuple(selected)
+            search_text = st.text_input("Search description", key=f"{key}_search")
+        
+        with col2:
+            min_amount = st.number_input("Min amount", min_value=0.0, value=0.0, key=f"{key}_min_amount")
+            max_amount = st.number_input("Max amount (0 = no limit)", min_value=0.0, value=0.0, key=f"{key}_max_amount")
+            amount_range = None
+            if min_amount > 0 or max_amount > 0:
+                amount_range = (min_amount if min_amount > 0 else None, max_amount if max_amount > 0 else None)
+            flag_labels = st.multiselect("Flag type", list(FLAG_COLUMNS), default=default_flags or [],
+                                         key=f"{key}_flags")
+        
+        with col3:
+            sort_options = {'Date': 'transaction_date', 'Amount': 'amount', 'Balance': 'balance'}
+            sort_label = st.selectbox("Sort by", list(sort_options), key=f"{key}_sort")
+            ascending = st.radio("Order", ["Ascending", "Descending"], horizontal=True,
+                                 key=f"{key}_order") == "Ascending"
+            page_size = st.selectbox("Rows per page", [25, 50, 100, 250], index=1, key=f"{key}_page_size")
+    
+    positions = filter_transactions(
+        analyzed_df, table_index,
+        date_range=date_range,
+        amount_range=amount_range,
+        flag_columns=[FLAG_COLUMNS[label] for label in flag_labels],
+        search_text=search_text,
+        sort_by=sort_options[sort_label],
+        ascending=ascending
+    )
+    
+    if len(positions) == 0:
+        st.info("No transactions match the current filters.")
+        return 0
+    
+    page_count = (len(positions) - 1) // page_size + 1
+    page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1,
+                           step=1, key=f"{key}_page")
+    page_positions = paginate(positions, int(page), page_size)
+    
+    st.caption(f"Showing rows {(int(page) - 1) * page_size + 1}-{(int(page) - 1) * page_size + len(page_positions)} "
+               f"of {len(positions):,} matching transactions")
+    st.dataframe(analyzed_df.iloc[page_positions], use_container_width=True)
+    
+    return len(positions)
+
 def main():
     st.title("🏦 Bank Statement Analysis Tool")
     st.markdown("Upload your bank statement PDF to analyze transactions and detect patterns.")
@@ -21,36 +158,37 @@ def main():
     # Debug mode toggle
     debug_mode = st.sidebar.checkbox("Debug Mode", value=True)
     
+    # Optional date range: only pages overlapping it are extracted
+    date_range = None
+    if st.sidebar.checkbox("Limit to date range", value=False):
+        start_date = st.sidebar.date_input("From", key="extract_from")
+        end_date = st.sidebar.date_input("To", key="extract_to")
+        if start_date > end_date:
+            st.sidebar.warning("'From' date is after 'To' date")
+        else:
+            date_range = (start_date, end_date)
+    
     # File upload
     uploaded_file = st.file_uploader("Choose a PDF file", type="pdf")
     
     if uploaded_file is not None:
         # Create temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-            tmp_file.write(uploaded_file.getvalue())
-            tmp_path = tmp_file.name
+        file_bytes = uploaded_file.getvalue()
+        file_hash = hashlib.md5(file_bytes).hexdigest()
+        # Results depend on both the file and the requested date range
+        statement_key = file_hash if date_range is None else f"{file_hash}:{date_range[0]}:{date_range[1]}"
         
         try:
             # Initialize components
-            extractor = PDFExtractor()
             analyzer = TransactionAnalyzer()
             visualizer = StatementVisualizer()
             
-            # Extract raw text for debugging
-            if debug_mode:
-                with pdfplumber.open(tmp_path) as pdf:
-                    debug_text = ""
-                    for i, page in enumerate(pdf.pages):
-                        text = page.extract_text()
-                        if text:
-                            debug_text += f"--- Page {i+1} ---\n{text}\n\n"
-                
-                with st.expander("🔍 Raw Text Preview (Debug)"):
-                    st.text_area("Full Text", debug_text, height=300)
-            
             # Extract data
-            with st.spinner("Extracting data from PDF..."):
-                account_df, transactions_df, bank_type = extractor.extract_from_pdf(tmp_path)
+            account_df, transactions_df, bank_type = extract_statement(statement_key, file_bytes, date_range)
+            
+            # Raw text for debugging, as read by the extraction worker
+            if debug_mode:
+                render_raw_text_preview()
             
             st.success(f"✅ Successfully processed {bank_type} bank statement!")
             
@@ -76,8 +214,8 @@ def main():
                 st.write(f"**Bank Type Detected:** {bank_type}")
             
             # Analyze transactions if we have them
-            if not transactions_df.empty:
-                analyzed_df, summary = analyzer.analyze_transactions(transactions_df)
+            if validate_transactions(transactions_df):
+                analyzed_df, summary, table_index = analyze_statement(statement_key, transactions_df)
                 
                 # Display summary metrics
                 st.subheader("📊 Transaction Summary")
@@ -102,22 +240,38 @@ def main():
                 timeline_fig = visualizer.create_timeline_plot(analyzed_df, bank_type)
                 st.plotly_chart(timeline_fig, use_container_width=True)
                 
+                # Counterparties
+                counterparty_df = analyzer.summarize_counterparties(analyzed_df)
+                if not counterparty_df.empty:
+                    st.subheader("🤝 Top Counterparties")
+                    counterparty_fig = visualizer.create_top_counterparties_chart(counterparty_df)
+                    st.plotly_chart(counterparty_fig, use_container_width=True)
+                
+                # Recurring and duplicate transactions
+                st.subheader("🔁 Recurring & Duplicate Transactions")
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    st.metric("Recurring Series", summary['recurring_series_count'])
+                
+                with col2:
+                    st.metric("Duplicate Entries", summary['duplicate_count'])
+                
+                recurring_df = analyzer.summarize_recurring(analyzed_df)
+                if not recurring_df.empty:
+                    st.dataframe(recurring_df, use_container_width=True)
+                
                 # Flagged transactions
                 st.subheader("🚩 Flagged Transactions Analysis")
-                flagged_df = analyzed_df[
-                    analyzed_df['is_large_dd'] | 
-                    analyzed_df['is_large_rtgs'] | 
-                    analyzed_df['is_suspicious_entity']
-                ]
-                
-                if not flagged_df.empty:
-                    st.dataframe(flagged_df, use_container_width=True)
+                if summary['flagged_transactions'] > 0:
+                    render_transaction_table(analyzed_df, table_index, key="flagged",
+                                             default_flags=list(FLAG_COLUMNS))
                 else:
                     st.success("🎉 No suspicious transactions detected!")
                 
                 # Raw transactions data
                 st.subheader("💾 All Transactions")
-                st.dataframe(analyzed_df, use_container_width=True)
+                render_transaction_table(analyzed_df, table_index, key="all")
                 
             else:
                 st.warning("⚠️ No transactions found in the statement.")
@@ -130,22 +284,17 @@ def main():
                     # Show sample of what was extracted
                     if debug_mode:
                         st.write("**First few lines of raw text for analysis:**")
-                        with pdfplumber.open(tmp_path) as pdf:
-                            first_page_text = pdf.pages[0].extract_text()
-                            lines = first_page_text.split('\n')
-                            for i, line in enumerate(lines[:10]):
-                                st.write(f"{i}: {line}")
+                        first_page_text = extracted_page_texts().get(0, "")
+                        lines = first_page_text.split('\n')
+                        for i, line in enumerate(lines[:10]):
+                            st.write(f"{i}: {line}")
                 
         except Exception as e:
             st.error(f"❌ Error processing PDF: {str(e)}")
             if debug_mode:
                 import traceback
                 st.code(traceback.format_exc())
-        
-        finally:
-            # Clean up temporary file
-            if os.path.exists(tmp_path):
-                os.remove(tmp_path)
+                render_raw_text_preview()
     
     else:
         # Instructions
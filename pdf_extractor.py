@@ -1,13 +1,34 @@
 import pdfplumber
+import PyPDF2
 import pandas as pd
+import numpy as np
 import re
+import os
+import json
+import hashlib
 from datetime import datetime
 import tempfile
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
+from backends import get_backend
 
 class PDFExtractor:
-    def __init__(self):
-        pass
+    def __init__(self, page_index_dir: Optional[str] = None, backend: str = 'pandas'):
+        # Table type of the returned transactions ('pandas', 'polars' or 'arrow')
+        self.backend = get_backend(backend)
+        # Text of each page extracted by the last extract_from_pdf call, for debugging
+        self.page_texts: Dict[int, str] = {}
+        # Page date indexes are cached on disk, keyed by the file hash
+        self.page_index_dir = page_index_dir or os.path.join(tempfile.gettempdir(), 'statement_page_index')
+        self.leading_date_pattern = re.compile(r'^\s*(\d{1,2})[-/](\d{1,2})[-/](\d{4}|\d{2})(?!\d)')
+        # Payment channels recognised at the start of a narration
+        self.narration_channels = ['NEFT', 'RTGS', 'IMPS', 'UPI', 'ACH', 'CMS']
+        self.channel_pattern = re.compile(
+            r'^(?:MMT[/\- ]+)?(' + '|'.join(self.narration_channels) + r')\b[\s/:\-]*(.*)$',
+            re.IGNORECASE
+        )
+        # Narration tokens that are never the counterparty
+        self.narration_noise = {'P2A', 'P2M', 'P2P', 'DR', 'CR', 'D', 'C', 'IN', 'OUT',
+                                'REF', 'NA', 'TRANSFER', 'PAYMENT', 'TRANSACTION'}
     
     def detect_bank(self, text: str) -> str:
         """Detect bank from text content - FIXED"""
@@ -118,14 +139,17 @@ class PDFExtractor:
         
         return info
 
-    def extract_transactions_icici(self, text: str) -> pd.DataFrame:
-        """Extract transactions from ICICI statement - FIXED"""
+    def extract_transactions_icici(self, text: str, continuation: bool = False) -> pd.DataFrame:
+        """Extract transactions from ICICI statement - FIXED
+        
+        continuation=True parses a later page whose table may not repeat the header.
+        """
         transactions = []
         
         try:
             # Find the transaction section more precisely
             lines = text.split('\n')
-            in_transaction_section = False
+            in_transaction_section = continuation
             transaction_lines = []
             
             # Look for the start of transaction table
@@ -304,13 +328,16 @@ class PDFExtractor:
         
         return info
 
-    def extract_transactions_hdfc(self, text: str) -> pd.DataFrame:
-        """Extract transactions from HDFC statement"""
+    def extract_transactions_hdfc(self, text: str, continuation: bool = False) -> pd.DataFrame:
+        """Extract transactions from HDFC statement
+        
+        continuation=True parses a later page whose table may not repeat the header.
+        """
         transactions = []
         
         try:
             lines = text.split('\n')
-            in_transaction_section = False
+            in_transaction_section = continuation
             transaction_lines = []
             
             for i, line in enumerate(lines):
@@ -385,37 +412,216 @@ class PDFExtractor:
         
         return None
 
-    def extract_from_pdf(self, pdf_path: str) -> Tuple[pd.DataFrame, pd.DataFrame, str]:
-        """Main extraction function"""
+    def parse_narration(self, description: str) -> Dict:
+        """Split a NEFT/RTGS/IMPS/UPI/ACH/CMS narration into channel, counterparty and reference"""
+        fields = {'channel': None, 'counterparty': None, 'reference_number': None}
+        
+        match = self.channel_pattern.match(str(description).strip())
+        if not match:
+            return fields
+        
+        fields['channel'] = match.group(1).upper()
+        
+        # Narrations are '/', '-' or ':' separated, e.g. UPI/123456789012/NAME/vpa@bank
+        tokens = [t.strip() for t in re.split(r'[/\-:]', match.group(2)) if t.strip()]
+        ifsc_pattern = re.compile(r'[A-Z]{4}0[A-Z0-9]{6}', re.IGNORECASE)
+        is_reference = [
+            bool(re.fullmatch(r'[A-Z]{0,6}\d{6,}[A-Z0-9]*', t.replace(' ', ''), re.IGNORECASE))
+            and not ifsc_pattern.fullmatch(t.replace(' ', ''))
+            for t in tokens
+        ]
+        
+        candidates = []
+        for i, token in enumerate(tokens):
+            compact = token.replace(' ', '')
+            if is_reference[i]:
+                if fields['reference_number'] is None:
+                    fields['reference_number'] = compact.upper()
+                continue
+            # Skip VPAs, IFSC codes and channel noise
+            if ('@' in token or
+                    ifsc_pattern.fullmatch(compact) or
+                    token.upper() in self.narration_noise or
+                    len(re.sub(r'[^A-Za-z]', '', token)) < 3):
+                continue
+            # A bare 4-letter code right before the reference is the remitting bank (NEFT/SBIN/ref/NAME)
+            bank_code = bool(re.fullmatch(r'[A-Z]{4}', compact)) and i + 1 < len(tokens) and is_reference[i + 1]
+            candidates.append((bank_code, token))
+        
+        if candidates:
+            names = [token for bank_code, token in candidates if not bank_code] or [candidates[0][1]]
+            fields['counterparty'] = re.sub(r'\s+', ' ', names[0]).upper()
+        
+        return fields
+    
+    def add_narration_fields(self, transactions_df: pd.DataFrame) -> pd.DataFrame:
+        """Add channel, counterparty and reference_number columns parsed from descriptions
+        
+        Channel and counterparty are stored as categoricals so downstream grouping
+        and matching works on the integer codes instead of the free-text strings.
+        """
+        enriched = transactions_df.copy()
+        descriptions = enriched.get('description', pd.Series(index=enriched.index, dtype=object))
+        descriptions = descriptions.astype('category')
+        
+        # Parse each distinct narration once and broadcast through the codes
+        parsed = [self.parse_narration(desc) for desc in descriptions.cat.categories]
+        codes = descriptions.cat.codes.to_numpy()
+        
+        for col in ['channel', 'counterparty', 'reference_number']:
+            # Trailing None picks up missing descriptions (code -1)
+            values = np.array([fields[col] for fields in parsed] + [None], dtype=object)
+            enriched[col] = values[codes]
+        
+        enriched['channel'] = pd.Categorical(enriched['channel'], categories=self.narration_channels)
+        enriched['counterparty'] = enriched['counterparty'].astype('category')
+        
+        return enriched
+    
+    def _parse_leading_date(self, text: str) -> Optional[datetime]:
+        """Parse a DD-MM-YYYY or DD/MM/YY(YY) date at the start of text"""
+        match = self.leading_date_pattern.match(text)
+        if not match:
+            return None
+        day, month, year = match.groups()
+        year = int(year) + 2000 if len(year) == 2 else int(year)
+        # Statement dates are never in the future; larger years are digits run together
+        if not 1900 <= year <= datetime.now().year + 1:
+            return None
+        try:
+            return datetime(year, int(month), int(day))
+        except ValueError:
+            return None
+    
+    def _page_date_span(self, page) -> Optional[Tuple[datetime, datetime]]:
+        """Earliest and latest transaction date on a PyPDF2 page, from the start of each text line
+        
+        PyPDF2 decodes the content stream without pdfminer's layout analysis, which is
+        what makes the index much cheaper than extracting the page. Pages it cannot
+        read get no span and are always extracted.
+        """
         try:
+            text = page.extract_text() or ""
+        except Exception:
+            return None
+        
+        dates = [date_obj for date_obj in map(self._parse_leading_date, text.split('\n')) if date_obj]
+        return (min(dates), max(dates)) if dates else None
+    
+    def build_page_index(self, pdf_path: str) -> List[Optional[Tuple[datetime, datetime]]]:
+        """First and last transaction date per page, cached by file hash"""
+        with open(pdf_path, 'rb') as f:
+            file_hash = hashlib.md5(f.read()).hexdigest()
+        cache_path = os.path.join(self.page_index_dir, f"{file_hash}.json")
+        
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path) as f:
+                    cached = json.load(f)
+                return [
+                    (datetime.fromisoformat(span[0]), datetime.fromisoformat(span[1])) if span else None
+                    for span in cached['pages']
+                ]
+            except (ValueError, KeyError, TypeError):
+                pass  # Rebuild a corrupt cache entry
+        
+        try:
+            page_index = [self._page_date_span(page) for page in PyPDF2.PdfReader(pdf_path).pages]
+        except Exception as e:
+            print(f"Could not index pages, extracting all of them: {e}")
             with pdfplumber.open(pdf_path) as pdf:
-                full_text = ""
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        full_text += page_text + "\n"
+                return [None] * len(pdf.pages)
+        
+        try:
+            os.makedirs(self.page_index_dir, exist_ok=True)
+            with open(cache_path, 'w') as f:
+                json.dump({'pages': [
+                    [span[0].isoformat(), span[1].isoformat()] if span else None for span in page_index
+                ]}, f)
+        except OSError as e:
+            print(f"Could not cache page index: {e}")
+        
+        return page_index
+    
+    def select_pages(self, page_index: List[Optional[Tuple[datetime, datetime]]],
+                     date_range: Tuple[datetime, datetime]) -> List[int]:
+        """Page numbers (0-based) whose transactions overlap date_range
+        
+        The first page is always kept since it carries the bank and account details.
+        Pages without a known date span are kept too; only pages known to fall
+        outside date_range are skipped.
+        """
+        start, end = date_range
+        selected = [0] if page_index else []
+        for page_number, span in enumerate(page_index[1:], start=1):
+            if span is None or (span[1] >= start and span[0] <= end):
+                selected.append(page_number)
+        return selected
+    
+    def extract_from_pdf(self, pdf_path: str,
+                         progress_callback: Optional[Callable[[int, int], None]] = None,
+                         date_range: Optional[Tuple[datetime, datetime]] = None) -> Tuple[pd.DataFrame, pd.DataFrame, str]:
+        """Main extraction function
+        
+        progress_callback, if given, is called as (pages_done, page_count) after each page.
+        date_range (start, end), if given, limits text extraction to the pages whose
+        transaction dates overlap it and keeps only transactions inside it.
+        """
+        try:
+            if date_range is not None:
+                date_range = (pd.Timestamp(date_range[0]).to_pydatetime(),
+                              pd.Timestamp(date_range[1]).to_pydatetime())
+                page_numbers = self.select_pages(self.build_page_index(pdf_path), date_range)
             
-            if not full_text.strip():
+            self.page_texts = {}
+            with pdfplumber.open(pdf_path) as pdf:
+                if date_range is None:
+                    page_numbers = range(len(pdf.pages))
+                page_count = len(page_numbers)
+                for pages_done, page_number in enumerate(page_numbers, start=1):
+                    page_text = pdf.pages[page_number].extract_text()
+                    self.page_texts[page_number] = page_text or ""
+                    if progress_callback:
+                        progress_callback(pages_done, page_count)
+            
+            page_texts = [text for text in self.page_texts.values() if text.strip()]
+            if not page_texts:
                 raise ValueError("No text could be extracted from PDF")
             
-            # Detect bank type
-            bank_type = self.detect_bank(full_text)
+            # Bank and account details come from the first page with text
+            bank_type = self.detect_bank(page_texts[0])
             print(f"Detected bank: {bank_type}")  # Debug print
             
             # Extract account information
             if bank_type == 'HDFC':
-                account_info = self.extract_account_info_hdfc(full_text)
-                transactions_df = self.extract_transactions_hdfc(full_text)
+                account_info = self.extract_account_info_hdfc(page_texts[0])
+                extract_transactions = self.extract_transactions_hdfc
             elif bank_type == 'ICICI':
-                account_info = self.extract_account_info_icici(full_text)
-                transactions_df = self.extract_transactions_icici(full_text)
+                account_info = self.extract_account_info_icici(page_texts[0])
+                extract_transactions = self.extract_transactions_icici
             else:
                 raise ValueError(f"Unsupported bank type: {bank_type}")
             
+            # Each page is parsed on its own: the parsers stop at a page footer, and
+            # with a date range the selected pages need not follow one another
+            page_frames = [extract_transactions(text, continuation=position > 0)
+                           for position, text in enumerate(page_texts)]
+            page_frames = [frame for frame in page_frames if not frame.empty]
+            transactions_df = pd.concat(page_frames, ignore_index=True) if page_frames else pd.DataFrame()
+            
+            # Selected pages can still carry transactions just outside the range
+            if date_range is not None and not transactions_df.empty:
+                start, end = date_range
+                dates = transactions_df['transaction_date']
+                transactions_df = transactions_df[(dates >= start) & (dates <= end)].reset_index(drop=True)
+            
+            # Structured narration fields
+            transactions_df = self.add_narration_fields(transactions_df)
+            
             # Create account info DataFrame
             account_df = pd.DataFrame([account_info])
             
-            return account_df, transactions_df, bank_type
+            return account_df, self.backend.from_pandas(transactions_df), bank_type
             
         except Exception as e:
             raise Exception(f"Error processing PDF: {str(e)}")
\ No newline at end of file
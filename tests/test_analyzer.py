@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer import TransactionAnalyzer
+
+def make_transactions(rows):
+    transactions_df = pd.DataFrame(rows, columns=['transaction_date', 'description', 'withdrawal_amount',
+                                                  'deposit_amount', 'balance'])
+    transactions_df['transaction_date'] = pd.to_datetime(transactions_df['transaction_date'])
+    return transactions_df
+
+def test_salary_alternating_around_an_amount_is_one_monthly_series():
+    # 99,800 and 100,200 fall on either side of a fixed log band edge
+    transactions_df = make_transactions([
+        (f'2023-{month:02d}-01', 'NEFT SALARY ACME CORP', 0.0, 99800.0 if month % 2 else 100200.0, 0.0)
+        for month in range(1, 13)
+    ])
+
+    analyzed_df, summary = TransactionAnalyzer().analyze_transactions(transactions_df)
+
+    assert summary['recurring_series_count'] == 1
+    assert (analyzed_df['recurring_series'] == 0).all()
+    assert (analyzed_df['recurrence'] == 'monthly').all()
+
+def test_amounts_further_apart_than_the_tolerance_are_separate_series():
+    transactions_df = make_transactions(
+        [(f'2023-{month:02d}-05', 'ACH HDFC LOAN EMI', 12000.0, 0.0, 0.0) for month in range(1, 13)] +
+        [(f'2023-{month:02d}-20', 'ACH HDFC LOAN EMI', 30000.0, 0.0, 0.0) for month in range(1, 13)]
+    )
+
+    analyzed_df, summary = TransactionAnalyzer().analyze_transactions(transactions_df)
+
+    assert summary['recurring_series_count'] == 2
+    assert analyzed_df.groupby('withdrawal_amount')['recurring_series'].nunique().eq(1).all()
@@ -0,0 +1,71 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from linker import StatementLinker
+
+def make_statement(account_number, rows):
+    account_df = pd.DataFrame([{'account_number': account_number}])
+    transactions_df = pd.DataFrame(rows, columns=['transaction_date', 'description', 'withdrawal_amount',
+                                                  'deposit_amount', 'balance'])
+    transactions_df['transaction_date'] = pd.to_datetime(transactions_df['transaction_date'])
+    return account_df, transactions_df, 'HDFC'
+
+def test_greedy_assignment_keeps_second_best_match():
+    sender = make_statement('111', [
+        ('2024-01-01', 'W1', 5000.0, 0.0, 0.0),
+        ('2024-01-02', 'W2', 5000.0, 0.0, 0.0),
+    ])
+    receiver = make_statement('222', [
+        ('2024-01-02', 'D1', 0.0, 5000.0, 0.0),
+        ('2024-01-04', 'D2', 0.0, 5000.0, 0.0),
+    ])
+
+    edges = StatementLinker(day_tolerance=3).find_transfers([sender, receiver])
+
+    pairs = set(zip(edges['withdrawal_description'], edges['deposit_description']))
+    assert pairs == {('W2', 'D1'), ('W1', 'D2')}
+
+def test_statements_of_the_same_account_do_not_collide():
+    period_1 = make_statement('111', [('2024-01-01', 'W period 1', 700.0, 0.0, 0.0)])
+    period_2 = make_statement('111', [('2024-02-01', 'W period 2', 700.0, 0.0, 0.0)])
+    other = make_statement('333', [
+        ('2024-01-01', 'D1', 0.0, 700.0, 0.0),
+        ('2024-02-01', 'D2', 0.0, 700.0, 0.0),
+    ])
+
+    edges = StatementLinker().find_transfers([period_1, period_2, other])
+
+    assert len(edges) == 2
+    assert sorted(edges['withdrawal_statement']) == [0, 1]
+    assert (edges['withdrawal_row'] == 0).all()
+
+def test_same_account_is_never_linked_to_itself():
+    period_1 = make_statement('111', [('2024-01-01', 'W', 900.0, 0.0, 0.0)])
+    period_2 = make_statement('111', [('2024-01-01', 'D', 0.0, 900.0, 0.0)])
+
+    assert StatementLinker().find_transfers([period_1, period_2]).empty
+
+def test_common_round_amounts_are_all_matched():
+    days = pd.date_range('2024-01-01', periods=20).strftime('%Y-%m-%d')
+    sender = make_statement('111', [(day, 'W', 1000.0, 0.0, 0.0) for day in days for _ in range(50)])
+    receiver = make_statement('222', [(day, 'D', 0.0, 1000.0, 0.0) for day in days for _ in range(50)])
+
+    edges = StatementLinker().find_transfers([sender, receiver])
+
+    assert len(edges) == 1000
+    assert (edges['day_gap'] == 0).all()
+    assert not edges.duplicated(['deposit_statement', 'deposit_row']).any()
+
+def test_same_account_deposits_do_not_hide_a_transfer():
+    # More same-day refunds in the sender's own account than candidates looked at per side
+    sender = make_statement('111', [('2024-01-01', 'W', 2500.0, 0.0, 0.0)] +
+                                   [('2024-01-01', 'Refund', 0.0, 2500.0, 0.0)] * 10)
+    receiver = make_statement('222', [('2024-01-03', 'D', 0.0, 2500.0, 0.0)])
+
+    edges = StatementLinker(candidates_per_side=2).find_transfers([sender, receiver])
+
+    assert list(zip(edges['withdrawal_description'], edges['deposit_description'])) == [('W', 'D')]
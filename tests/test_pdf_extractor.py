@@ -0,0 +1,73 @@
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_extractor import PDFExtractor
+
+def write_pdf(path, pages):
+    """Minimal PDF with one Courier text line per entry of each page"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>"]
+    page_ids = []
+    for lines in pages:
+        text = " ".join("(%s) '" % line for line in lines)
+        stream = ("BT /F1 8 Tf 20 800 Td 10 TL %s ET" % text).encode()
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] /Contents %d 0 R "
+                       b"/Resources << /Font << /F1 3 0 R >> >> >>" % len(objects))
+        page_ids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % page_id for page_id in page_ids), len(page_ids))
+
+    output = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF" % (len(objects) + 1, xref)
+    with open(path, 'wb') as f:
+        f.write(output)
+
+def write_icici_statement(path, months=6):
+    """One page per month, each closed by a 'Page Total' footer"""
+    pages = []
+    for month in range(1, months + 1):
+        lines = ["ICICI BANK LIMITED", "Account Number 007701002532"] if month == 1 else []
+        lines.append("Statement of transactions" if month == 1 else "Date Particulars Withdrawals Deposits Balance")
+        for day in (3, 13, 23):
+            txn_date = date(2022, month, day)
+            lines.append(f"{txn_date:%d-%m-%Y} NEFT-SBIN0001234-ACME CORP 1,000.00 Cr {month * 10000 + day}.00 Cr")
+        lines.append("Page Total 3,000.00")
+        pages.append(lines)
+    write_pdf(path, pages)
+
+def test_date_range_extracts_transactions_from_later_pages(tmp_path):
+    pdf_path = str(tmp_path / "statement.pdf")
+    write_icici_statement(pdf_path)
+    extractor = PDFExtractor(page_index_dir=str(tmp_path / "index"))
+
+    account_df, transactions_df, bank_type = extractor.extract_from_pdf(
+        pdf_path, date_range=(date(2022, 3, 1), date(2022, 4, 30)))
+
+    assert bank_type == 'ICICI'
+    assert account_df['account_number'].iloc[0] == '007701002532'
+    assert sorted(extractor.page_texts) == [0, 2, 3]
+    assert len(transactions_df) == 6
+    assert transactions_df['transaction_date'].min().date() == date(2022, 3, 3)
+    assert transactions_df['transaction_date'].max().date() == date(2022, 4, 23)
+
+def test_every_page_is_parsed_without_a_date_range(tmp_path):
+    pdf_path = str(tmp_path / "statement.pdf")
+    write_icici_statement(pdf_path)
+
+    _, transactions_df, _ = PDFExtractor(page_index_dir=str(tmp_path / "index")).extract_from_pdf(pdf_path)
+
+    assert len(transactions_df) == 18
+    dates = transactions_df['transaction_date']
+    assert list(dates) == sorted(dates)
+    assert dates.max().date() == date(2022, 6, 23)
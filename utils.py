@@ -1,9 +1,19 @@
 import pandas as pd
+import numpy as np
 import os
 from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from backends import backend_for
 
-def save_to_csv(dataframe: pd.DataFrame, filename: str, output_dir: str = "output"):
-    """Save DataFrame to CSV with timestamp"""
+# Display label -> analyzer flag column
+FLAG_COLUMNS = {
+    'Large DD Withdrawals': 'is_large_dd',
+    'Large RTGS Deposits': 'is_large_rtgs',
+    'Suspicious Entities': 'is_suspicious_entity'
+}
+
+def save_to_csv(dataframe, filename: str, output_dir: str = "output"):
+    """Save DataFrame (pandas, Polars or Arrow) to CSV with timestamp"""
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
     
@@ -11,17 +21,18 @@ def save_to_csv(dataframe: pd.DataFrame, filename: str, output_dir: str = "outpu
     filename = f"{filename}_{timestamp}.csv"
     filepath = os.path.join(output_dir, filename)
     
-    dataframe.to_csv(filepath, index=False)
+    backend_for(dataframe).write_csv(dataframe, filepath)
     return filepath
 
-def validate_transactions(transactions_df: pd.DataFrame) -> bool:
+def validate_transactions(transactions_df) -> bool:
     """Basic validation of transactions DataFrame"""
     required_columns = ['transaction_date', 'description', 'withdrawal_amount', 'deposit_amount', 'balance']
+    backend = backend_for(transactions_df)
     
-    if not all(col in transactions_df.columns for col in required_columns):
+    if not all(col in backend.column_names(transactions_df) for col in required_columns):
         return False
     
-    if transactions_df.empty:
+    if backend.num_rows(transactions_df) == 0:
         return False
     
     return True
@@ -33,4 +44,80 @@ def format_currency(amount: float) -> str:
     elif amount >= 100000:  # 1 lakh
         return f"₹{amount/100000:.2f}L"
     else:
-        return f"₹{amount:,.2f}"
\ No newline at end of file
+        return f"₹{amount:,.2f}"
+
+def build_table_index(transactions_df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Build sorted position arrays on date and amount for range filtering"""
+    dates = pd.to_datetime(transactions_df['transaction_date']).to_numpy(dtype='datetime64[ns]')
+    # A row is either a withdrawal or a deposit, so the larger side is its amount
+    amounts = np.maximum(
+        transactions_df['withdrawal_amount'].to_numpy(dtype=float),
+        transactions_df['deposit_amount'].to_numpy(dtype=float)
+    )
+    
+    date_order = np.argsort(dates, kind='stable')
+    amount_order = np.argsort(amounts, kind='stable')
+    
+    return {
+        'date_order': date_order,
+        'date_sorted': dates[date_order],
+        'amount_order': amount_order,
+        'amount_sorted': amounts[amount_order],
+        'amount': amounts
+    }
+
+def _range_positions(order: np.ndarray, sorted_values: np.ndarray, low, high, high_side: str) -> np.ndarray:
+    """Row positions whose sorted value falls within [low, high] via binary search"""
+    start = np.searchsorted(sorted_values, low, side='left') if low is not None else 0
+    end = np.searchsorted(sorted_values, high, side=high_side) if high is not None else len(sorted_values)
+    return order[start:end]
+
+def filter_transactions(transactions_df: pd.DataFrame, table_index: Dict[str, np.ndarray],
+                        date_range: Optional[Tuple] = None, amount_range: Optional[Tuple] = None,
+                        flag_columns: Optional[List[str]] = None, search_text: str = "",
+                        sort_by: Optional[str] = None, ascending: bool = True) -> np.ndarray:
+    """Return row positions matching all filters, in display order
+    
+    Date and amount ranges are resolved with binary search on the table index,
+    the remaining filters only look at the rows that survive them.
+    """
+    candidates = None
+    
+    if date_range is not None:
+        start, end = date_range
+        low = np.datetime64(pd.Timestamp(start)) if start is not None else None
+        # End date is inclusive
+        high = np.datetime64(pd.Timestamp(end) + pd.Timedelta(days=1)) if end is not None else None
+        candidates = _range_positions(table_index['date_order'], table_index['date_sorted'], low, high, 'left')
+    
+    if amount_range is not None:
+        low, high = amount_range
+        amount_positions = _range_positions(table_index['amount_order'], table_index['amount_sorted'], low, high, 'right')
+        candidates = amount_positions if candidates is None else np.intersect1d(candidates, amount_positions)
+    
+    if candidates is None:
+        candidates = np.arange(len(transactions_df))
+    
+    if flag_columns:
+        flags = transactions_df[flag_columns].to_numpy(dtype=bool)[candidates]
+        candidates = candidates[flags.any(axis=1)]
+    
+    if search_text:
+        descriptions = pd.Series(transactions_df['description'].to_numpy(dtype=object)[candidates])
+        matches = descriptions.str.contains(search_text, case=False, regex=False, na=False)
+        candidates = candidates[matches.to_numpy(dtype=bool)]
+    
+    if sort_by is not None:
+        if sort_by == 'amount':
+            values = table_index['amount'][candidates]
+        else:
+            values = transactions_df[sort_by].to_numpy()[candidates]
+        order = np.argsort(values, kind='stable')
+        candidates = candidates[order if ascending else order[::-1]]
+    
+    return candidates
+
+def paginate(positions: np.ndarray, page: int, page_size: int) -> np.ndarray:
+    """Slice out a 1-based page of row positions"""
+    start = (page - 1) * page_size
+    return positions[start:start + page_size]
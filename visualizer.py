@@ -121,4 +121,37 @@ class StatementVisualizer:
             color_discrete_sequence=['#FFA15A', '#19D3F3', '#FF6692']
         )
         
-        return fig
\ No newline at end of file
+        return fig
+    
+    def create_top_counterparties_chart(self, counterparty_df: pd.DataFrame) -> go.Figure:
+        """Create horizontal bar chart of the largest counterparties by volume"""
+        # Largest at the top
+        ordered = counterparty_df.iloc[::-1]
+        
+        fig = go.Figure()
+        
+        fig.add_trace(go.Bar(
+            x=ordered['deposit_amount'],
+            y=ordered['counterparty'],
+            orientation='h',
+            name='Deposits',
+            marker_color=self.color_scheme['deposit']
+        ))
+        
+        fig.add_trace(go.Bar(
+            x=ordered['withdrawal_amount'],
+            y=ordered['counterparty'],
+            orientation='h',
+            name='Withdrawals',
+            marker_color=self.color_scheme['withdrawal']
+        ))
+        
+        fig.update_layout(
+            title="Top Counterparties",
+            xaxis_title="Amount (₹)",
+            yaxis_title="Counterparty",
+            barmode='stack',
+            template='plotly_white'
+        )
+        
+        return fig